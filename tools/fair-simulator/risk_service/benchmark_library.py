@@ -1,53 +1,95 @@
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json reads the same file
+    orjson = None
 
 # Path to shared JSON (adjust if layout differs)
 BASE_DIR = Path(__file__).resolve().parents[1]
 BENCHMARKS_PATH = BASE_DIR / "shared" / "iris2025_benchmarks.json"
 
-with BENCHMARKS_PATH.open("r", encoding="utf-8") as f:
-    IRIS_2025 = json.load(f)
+if orjson is not None:
+    IRIS_2025 = orjson.loads(BENCHMARKS_PATH.read_bytes())
+else:
+    with BENCHMARKS_PATH.open("r", encoding="utf-8") as f:
+        IRIS_2025 = json.load(f)
+
+
+def _freeze(value: Any) -> Any:
+    """Deep read-only copy: dicts become MappingProxyType, lists become tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# Lookups hand out nested IRIS_2025 entries by reference, so the whole
+# dataset is frozen once rather than copied on every call
+IRIS_2025 = _freeze(IRIS_2025)
+
+# Lookup tables resolved once, so calls don't walk IRIS_2025 each time
+_LEF_INDUSTRY = IRIS_2025["lef_by_industry"]
+_LEF_REVENUE = IRIS_2025["lef_by_revenue"]
+_LM_INDUSTRY = IRIS_2025["lm_by_industry"]
+_LM_REVENUE = IRIS_2025["lm_by_revenue"]
+_LEF_BASELINE = IRIS_2025["lef_overall_baseline"]
+_LM_BASELINE = IRIS_2025["lm_overall_baseline"]
+_SOURCE = IRIS_2025["metadata"]["source"]
 
+# Fallback for unknown industries; description is filled in on a miss
+_MISSING_INDUSTRY: Dict[str, Any] = {
+    "probability": None,
+    "confidence": "none",
+    "description": None,
+    "source": _SOURCE,
+}
+
+# Shared results for the common no-filter call
+_EMPTY_LEF = MappingProxyType({"industry": None, "revenue": None, "overall_baseline": _LEF_BASELINE})
+_EMPTY_LM = MappingProxyType({"industry": None, "revenue": None, "overall_baseline": _LM_BASELINE})
+
+
+# Results are cached and shared between callers, so they are returned
+# read-only all the way down (nested entries come from the frozen IRIS_2025)
+@lru_cache(maxsize=512)
 def get_lef_benchmark(industry: Optional[str] = None,
-                      revenue: Optional[str] = None) -> Dict[str, Any]:
-    data = IRIS_2025
-    result: Dict[str, Any] = {
-        "industry": None,
-        "revenue": None,
-        "overall_baseline": data["lef_overall_baseline"],
-    }
+                      revenue: Optional[str] = None) -> Mapping[str, Any]:
+    if not industry and not revenue:
+        return _EMPTY_LEF
+
+    result: Dict[str, Any] = dict(_EMPTY_LEF)
 
     if industry:
-        result["industry"] = data["lef_by_industry"].get(
-            industry,
-            {
-                "probability": None,
-                "confidence": "none",
-                "description": f"No data available for {industry}",
-                "source": data["metadata"]["source"],
-            },
-        )
+        result["industry"] = _LEF_INDUSTRY.get(industry)
+        if result["industry"] is None:
+            result["industry"] = MappingProxyType(dict(
+                _MISSING_INDUSTRY,
+                description=f"No data available for {industry}",
+            ))
 
     if revenue:
-        if revenue in data["lef_by_revenue"]:
-            result["revenue"] = data["lef_by_revenue"][revenue]
+        result["revenue"] = _LEF_REVENUE.get(revenue)
 
-    return result
+    return MappingProxyType(result)
 
+@lru_cache(maxsize=512)
 def get_lm_benchmark(industry: Optional[str] = None,
-                     revenue: Optional[str] = None) -> Dict[str, Any]:
-    data = IRIS_2025
-    result: Dict[str, Any] = {
-        "industry": None,
-        "revenue": None,
-        "overall_baseline": data["lm_overall_baseline"],
-    }
+                     revenue: Optional[str] = None) -> Mapping[str, Any]:
+    if not industry and not revenue:
+        return _EMPTY_LM
+
+    result: Dict[str, Any] = dict(_EMPTY_LM)
 
     if industry:
-        result["industry"] = data["lm_by_industry"].get(industry)
+        result["industry"] = _LM_INDUSTRY.get(industry)
 
     if revenue:
-        result["revenue"] = data["lm_by_revenue"].get(revenue)
+        result["revenue"] = _LM_REVENUE.get(revenue)
 
-    return result
\ No newline at end of file
+    return MappingProxyType(result)
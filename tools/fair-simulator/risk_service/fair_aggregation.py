@@ -3,10 +3,216 @@ FAIR Risk Aggregation
 Combines multiple risk scenarios into portfolio-level metrics
 """
 
+import math
+import multiprocessing as mp
+import threading
 import numpy as np
-from typing import List, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Dict, Optional, Tuple
 from dataclasses import dataclass
+from operator import attrgetter
 from fair_calculator import FAIRInputs, FAIRCalculator, FAIRResults
+from fair_distributions import validate_percentiles_batch
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; the NumPy copula path is used instead
+    njit = None
+
+try:
+    import numexpr as ne
+except ImportError:  # numexpr is optional; plain in-place NumPy ops are used instead
+    ne = None
+
+# Below this many samples in total (n_scenarios * n_simulations) scenarios
+# run in-process: that is about a second of serial work, less than shipping
+# the inputs and results to worker processes is worth
+PARALLEL_MIN_SAMPLES = 5_000_000
+
+# Worker processes shared by every caller (and every API request) in this process
+MAX_WORKERS = min(8, mp.cpu_count())
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _calc_scenario(args: Tuple[FAIRInputs, int, Optional[int], np.dtype]) -> Tuple[np.ndarray, float, float]:
+    """Run one scenario's Monte Carlo (module-level so worker processes can pickle it)"""
+    inputs, n_simulations, seed, dtype = args
+    results = FAIRCalculator(n_simulations, seed, dtype).calculate(inputs, keep_samples=True)
+    return results.ale_samples, results.ale_p50, results.ale_p90
+
+
+def scenario_means(args: Tuple[FAIRInputs, int, Optional[int], np.dtype]) -> Tuple[float, float, float]:
+    """Run one scenario and keep only its ALE / LEF / LM means (picklable like _calc_scenario)"""
+    inputs, n_simulations, seed, dtype = args
+    results = FAIRCalculator(n_simulations, seed, dtype).calculate(inputs)
+    return results.ale_mean, results.lef_mean, results.lm_mean
+
+
+# (p10, p50, p90) of each percentile group the calculator validates
+_TEF_GET = attrgetter("tef_p10", "tef_p50", "tef_p90")
+_SUSC_GET = attrgetter("susc_p10", "susc_p50", "susc_p90")
+_SLEF_GET = attrgetter("slef_p10", "slef_p50", "slef_p90")
+_SECONDARY_P50_GET = attrgetter("fines_p50", "competitive_adv_p50", "reputation_p50")
+
+
+def validate_scenarios(scenario_inputs: Dict[str, FAIRInputs]) -> None:
+    """
+    Run the calculator's percentile checks on every scenario in one pass,
+    before any of them is simulated.
+
+    Raises:
+        ValueError: naming every failing scenario, not just the first
+    """
+    ids = np.array(list(scenario_inputs), dtype=object)
+    inputs = list(scenario_inputs.values())
+    if not inputs:
+        return
+
+    # SLEF only matters for scenarios with secondary losses
+    has_secondary = np.array([max(_SECONDARY_P50_GET(i)) > 0 for i in inputs])
+    groups = [
+        ("TEF", ids, [_TEF_GET(i) for i in inputs], {"min_val": 0}),
+        ("Susceptibility", ids, [_SUSC_GET(i) for i in inputs],
+         {"min_val": 0, "max_val": 100, "is_probability": True}),
+        ("SLEF", ids[has_secondary], [_SLEF_GET(i) for i, s in zip(inputs, has_secondary) if s],
+         {"min_val": 0, "max_val": 100, "is_probability": True}),
+    ]
+
+    problems = []
+    for label, group_ids, rows, bounds in groups:
+        if not rows:
+            continue
+        _, errors = validate_percentiles_batch(np.array(rows, dtype=float), **bounds)
+        for message, idx in errors.items():
+            problems.append(
+                f"Invalid {label} percentiles ({message}) in scenarios: "
+                + ", ".join(map(str, group_ids[idx]))
+            )
+    if problems:
+        raise ValueError("; ".join(problems))
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """The shared worker pool, started on first use and kept for the process lifetime"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn, not fork: forking after numba has started its worker
+            # threads (correlated path) leaves the children deadlocked at exit
+            _executor = ProcessPoolExecutor(MAX_WORKERS, mp_context=mp.get_context("spawn"))
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop the shared worker pool; the next parallel map starts a new one"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+def _use_pool(args: list) -> bool:
+    """Whether per-scenario args tuples, (inputs, n_simulations, ...), are worth the pool"""
+    return (MAX_WORKERS > 1 and len(args) > 1
+            and sum(a[1] for a in args) >= PARALLEL_MIN_SAMPLES)
+
+
+def _pool_map(func, args: list) -> Iterator:
+    global _executor
+    executor = _get_executor()
+    try:
+        yield from executor.map(func, args)
+    except BrokenProcessPool:
+        # A dead worker poisons the whole executor; replace it next time
+        with _executor_lock:
+            if _executor is executor:
+                _executor = None
+        raise
+
+
+def map_scenarios(func, args: list) -> list:
+    """
+    Apply a module-level per-scenario function to each args tuple, in order.
+
+    Scenarios are independent, so once there is enough work in total they
+    are spread over the shared worker pool.
+    """
+    if _use_pool(args):
+        return list(_pool_map(func, args))
+    return [func(a) for a in args]
+
+
+def imap_scenarios(func, args: list) -> Iterator:
+    """Like map_scenarios, but yields each result (still in submission order) as soon as it is ready"""
+    if _use_pool(args):
+        yield from _pool_map(func, args)
+    else:
+        for a in args:
+            yield func(a)
+
+
+if njit is not None:
+    # Not disk-cached: this module is imported both as fair_aggregation and as
+    # risk_service.fair_aggregation, and numba's cache is tied to the module name
+    @njit(parallel=True, fastmath=True)
+    def _copula_accumulate(sorted_ales, W, V, sqrt_rho, sqrt_1mrho, out):
+        """
+        Fused Gaussian copula: normal draw -> CDF -> empirical inverse CDF -> sum.
+
+        One pass over the simulations with no (n_simulations, n_scenarios)
+        temporaries. Uses the same linear interpolation as np.percentile.
+        """
+        n_sim, n_scen = V.shape
+        last = sorted_ales.shape[1] - 1
+        inv_sqrt2 = 1.0 / math.sqrt(2.0)
+        for j in prange(n_sim):
+            s = 0.0
+            for i in range(n_scen):
+                z = sqrt_rho * W[j] + sqrt_1mrho * V[j, i]
+                pos = 0.5 * (1.0 + math.erf(z * inv_sqrt2)) * last
+                lo = min(int(pos), last)
+                hi = min(lo + 1, last)
+                s += sorted_ales[i, lo] + (pos - lo) * (sorted_ales[i, hi] - sorted_ales[i, lo])
+            out[j] = s
+
+
+    @njit(fastmath=True)  # not disk-cached either, for the same reason
+    def _portfolio_reduce(ales, lefs, lms):
+        """Totals, LEF-weighted LM and first max-ALE index, with no temporaries"""
+        total_ale = 0.0
+        total_lef = 0.0
+        lef_lm = 0.0
+        for i in range(ales.shape[0]):
+            total_ale += ales[i]
+            total_lef += lefs[i]
+            lef_lm += lefs[i] * lms[i]
+        # Separate loop: the argmax branch would stop the sums vectorizing
+        imax = 0
+        for i in range(ales.shape[0]):
+            if ales[i] > ales[imax]:
+                imax = i
+        weighted_lm = lef_lm / total_lef if total_lef > 0 else 0.0
+        return total_ale, total_lef, weighted_lm, imax
+
+
+def portfolio_reduce(ales: np.ndarray, lefs: np.ndarray, lms: np.ndarray) -> Tuple[float, float, float, int]:
+    """
+    Reduce per-scenario means to portfolio metrics.
+
+    Returns:
+        (total ALE, total LEF, LEF-weighted average LM, index of the largest
+        ALE, first on ties; 0 for an empty portfolio)
+    """
+    if njit is not None:
+        return _portfolio_reduce(ales, lefs, lms)
+    total_lef = float(lefs.sum())
+    weighted_lm = float(lefs @ lms) / total_lef if total_lef > 0 else 0.0
+    imax = int(ales.argmax()) if ales.size else 0
+    return float(ales.sum()), total_lef, weighted_lm, imax
 
 
 @dataclass
@@ -73,14 +279,68 @@ class AggregatedRiskResults:
 class FAIRAggregator:
     """Aggregates multiple FAIR scenarios into portfolio-level risk"""
     
-    def __init__(self, n_simulations: int = 100000, random_state: Optional[int] = None):
+    def __init__(self, n_simulations: int = 100000, random_state: Optional[int] = None,
+                 dtype: np.dtype = np.float32):
+        """
+        Args:
+            n_simulations: Monte Carlo samples per scenario
+            random_state: Seed for reproducible results
+            dtype: Storage type for the per-scenario and portfolio ALE samples.
+                float32 halves memory traffic in the sums and percentile passes;
+                its ~7 significant digits are far below Monte Carlo noise at
+                100k samples. Summary statistics are always reported as float64.
+        """
         self.n_simulations = n_simulations
         self.random_state = random_state
-        self.calculator = FAIRCalculator(n_simulations, random_state)
+        self.dtype = np.dtype(dtype)
+        # One PCG64 stream per aggregator; successive correlated runs advance it
+        self.rng = np.random.default_rng(random_state)
+        # Copula draw buffers, reused across calls with the same shape
+        self._shared_buf: Optional[np.ndarray] = None
+        self._normal_buf: Optional[np.ndarray] = None
+
+    def _calculate_scenarios(self, scenario_inputs: Dict[str, FAIRInputs]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Simulate every scenario and stack ALE samples as (n_scenarios, n_simulations).
+
+        Also returns each scenario's ALE P50 and P90 as computed by the
+        calculator, so they are not re-derived from the sample matrix.
+        """
+        validate_scenarios(scenario_inputs)
+        args = [
+            (inputs, self.n_simulations,
+             self.random_state + i if self.random_state is not None else None,
+             self.dtype)
+            for i, inputs in enumerate(scenario_inputs.values())
+        ]
+
+        outs = map_scenarios(_calc_scenario, args)
+
+        samples = np.empty((len(args), self.n_simulations), dtype=self.dtype)
+        p50s = np.empty(len(args))
+        p90s = np.empty(len(args))
+        for i, (ale_samples, ale_p50, ale_p90) in enumerate(outs):
+            samples[i] = ale_samples
+            p50s[i] = ale_p50
+            p90s[i] = ale_p90
+        return samples, p50s, p90s
+    
+    @staticmethod
+    def _rank_scenarios(scenario_ids: List[str],
+                        scenario_p50s: np.ndarray,
+                        total_ale_p50: float) -> List[tuple]:
+        """(scenario_id, ale_p50, pct_of_total) sorted by descending P50 (stable for ties)"""
+        order = np.argsort(-scenario_p50s, kind='stable')
+        if total_ale_p50 > 0:
+            pcts = scenario_p50s / total_ale_p50 * 100
+        else:
+            pcts = np.zeros_like(scenario_p50s)
+        return [(scenario_ids[i], scenario_p50s[i], pcts[i]) for i in order]
     
     def aggregate_independent(self, 
                              scenario_inputs: Dict[str, FAIRInputs],
-                             scenario_metadata: Optional[Dict[str, ScenarioMetadata]] = None) -> AggregatedRiskResults:
+                             scenario_metadata: Optional[Dict[str, ScenarioMetadata]] = None,
+                             keep_samples: bool = True) -> AggregatedRiskResults:
         """
         Aggregate scenarios assuming statistical independence.
         
@@ -92,42 +352,47 @@ class FAIRAggregator:
         Args:
             scenario_inputs: Dict of scenario_id -> FAIRInputs
             scenario_metadata: Optional metadata for each scenario
+            keep_samples: Return the portfolio ALE samples; pass False when
+                only the summary statistics are needed
         
         Returns:
             Aggregated risk results
         """
-        # Calculate individual scenarios
-        individual_results = {}
-        for scenario_id, inputs in scenario_inputs.items():
-            individual_results[scenario_id] = self.calculator.calculate(inputs)
-        
-        # Sum ALE samples (independence assumption)
-        total_ale_samples = np.zeros(self.n_simulations)
-        scenario_contributions = {}
-        
-        for scenario_id, results in individual_results.items():
-            total_ale_samples += results.ale_samples
-            scenario_contributions[scenario_id] = results.ale_p50
-        
+        # Calculate individual scenarios, one row per scenario
+        samples, scenario_p50s, _ = self._calculate_scenarios(scenario_inputs)
+        return self._aggregate_independent_samples(
+            list(scenario_inputs.keys()), samples, scenario_p50s, keep_samples
+        )
+
+    def _aggregate_independent_samples(self,
+                                       scenario_ids: List[str],
+                                       samples: np.ndarray,
+                                       scenario_p50s: np.ndarray,
+                                       keep_samples: bool = True) -> AggregatedRiskResults:
+        """Independent aggregation of already-simulated (n_scenarios, n_simulations) ALE samples"""
+        # Sum ALE samples (independence assumption) in a single reduction.
+        # samples is C-ordered, so each scenario row is read contiguously.
+        total_ale_samples = np.empty(samples.shape[1], dtype=samples.dtype)
+        np.add.reduce(samples, axis=0, out=total_ale_samples)
+        return self._summarize(scenario_ids, total_ale_samples, scenario_p50s, 0.0, keep_samples)
+
+    def _summarize(self,
+                   scenario_ids: List[str],
+                   total_ale_samples: np.ndarray,
+                   scenario_p50s: np.ndarray,
+                   correlation: float,
+                   keep_samples: bool) -> AggregatedRiskResults:
+        """Portfolio statistics and scenario ranking for a vector of total ALE samples"""
+        scenario_contributions = dict(zip(scenario_ids, scenario_p50s))
+
         # Compute aggregate statistics
-        total_ale_mean = np.mean(total_ale_samples)
-        total_ale_p10 = np.percentile(total_ale_samples, 10)
-        total_ale_p50 = np.percentile(total_ale_samples, 50)
-        total_ale_p90 = np.percentile(total_ale_samples, 90)
-        total_ale_p95 = np.percentile(total_ale_samples, 95)
-        total_ale_p99 = np.percentile(total_ale_samples, 99)
+        total_ale_mean = total_ale_samples.mean(dtype=np.float64)
+        total_ale_p10, total_ale_p50, total_ale_p90, total_ale_p95, total_ale_p99 = np.percentile(
+            total_ale_samples, [10, 50, 90, 95, 99]
+        ).astype(np.float64)
         
         # Rank scenarios by contribution
-        sorted_scenarios = sorted(
-            scenario_contributions.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
-        
-        top_scenarios = [
-            (sid, ale, (ale / total_ale_p50) * 100 if total_ale_p50 > 0 else 0)
-            for sid, ale in sorted_scenarios
-        ]
+        top_scenarios = self._rank_scenarios(scenario_ids, scenario_p50s, total_ale_p50)
         
         return AggregatedRiskResults(
             total_ale_mean=total_ale_mean,
@@ -138,13 +403,58 @@ class FAIRAggregator:
             total_ale_p99=total_ale_p99,
             scenario_contributions=scenario_contributions,
             top_scenarios=top_scenarios,
-            assumed_correlation=0.0,
-            total_ale_samples=total_ale_samples,
+            assumed_correlation=correlation,
+            total_ale_samples=total_ale_samples if keep_samples else None,
         )
+
+    def _copula_total(self,
+                      samples: np.ndarray,
+                      W: np.ndarray,
+                      V: np.ndarray,
+                      sqrt_rho: float,
+                      sqrt_1mrho: float) -> np.ndarray:
+        """
+        Total ALE under a Gaussian copula with normals Z = sqrt_rho * W + sqrt_1mrho * V.
+
+        W is (n_simulations,), V is (n_simulations, n_scenarios) and is
+        overwritten on the NumPy path. Each scenario contributes its
+        empirical ALE quantile at ndtr(Z).
+        """
+        # Empirical inverse CDF per scenario: sort each row once
+        sorted_ales = np.sort(samples, axis=1)
+        
+        # Transform uniform samples to match each scenario's ALE distribution
+        total_ale_samples = np.zeros(self.n_simulations, dtype=self.dtype)
+        
+        if njit is not None:
+            _copula_accumulate(sorted_ales, W, V, sqrt_rho, sqrt_1mrho, total_ale_samples)
+            return total_ale_samples
+
+        # Only this path needs scipy; keep it off the module import
+        from scipy.special import ndtr
+
+        # Generate correlated uniform random variables via normal copula,
+        # overwriting the draw buffer rather than allocating temporaries
+        sr = self.dtype.type(sqrt_rho)
+        s1 = self.dtype.type(sqrt_1mrho)
+        if ne is not None:
+            ne.evaluate("sr * W + s1 * V",
+                        local_dict={"sr": sr, "s1": s1, "W": W[:, None], "V": V},
+                        out=V)
+        else:
+            V *= s1
+            V += sr * W[:, None]
+        uniform_samples = ndtr(V, out=V)
+        quantile_grid = np.linspace(0.0, 1.0, self.n_simulations)
+        for i in range(samples.shape[0]):
+            # Same linear interpolation np.percentile uses, without a per-call sort
+            total_ale_samples += np.interp(uniform_samples[:, i], quantile_grid, sorted_ales[i])
+        return total_ale_samples
     
     def aggregate_with_correlation(self,
                                    scenario_inputs: Dict[str, FAIRInputs],
-                                   correlation: float = 0.3) -> AggregatedRiskResults:
+                                   correlation: float = 0.3,
+                                   keep_samples: bool = True) -> AggregatedRiskResults:
         """
         Aggregate scenarios with assumed correlation between them.
         
@@ -157,6 +467,8 @@ class FAIRAggregator:
         Args:
             scenario_inputs: Dict of scenario_id -> FAIRInputs
             correlation: Assumed correlation coefficient (0 to 1)
+            keep_samples: Return the portfolio ALE samples; pass False when
+                only the summary statistics are needed
         
         Returns:
             Aggregated risk results
@@ -164,71 +476,82 @@ class FAIRAggregator:
         if not (0 <= correlation <= 1):
             raise ValueError("Correlation must be between 0 and 1")
         
-        # Calculate individual scenarios
-        individual_results = {}
-        for scenario_id, inputs in scenario_inputs.items():
-            individual_results[scenario_id] = self.calculator.calculate(inputs)
+        # Calculate individual scenarios, one row per scenario
+        scenario_ids = list(scenario_inputs.keys())
+        samples, scenario_p50s, _ = self._calculate_scenarios(scenario_inputs)
         
         # Create correlated samples using Gaussian copula approach
         n_scenarios = len(scenario_inputs)
         
-        # Generate correlated normal random variables
-        mean = np.zeros(n_scenarios)
-        # Correlation matrix: correlation everywhere except diagonal (which is 1)
-        cov = np.full((n_scenarios, n_scenarios), correlation)
-        np.fill_diagonal(cov, 1.0)
-        
-        # Generate correlated uniform random variables via normal copula
-        rng = np.random.RandomState(self.random_state)
-        normal_samples = rng.multivariate_normal(mean, cov, self.n_simulations)
-        uniform_samples = stats.norm.cdf(normal_samples)
-        
-        # Transform uniform samples to match each scenario's ALE distribution
-        total_ale_samples = np.zeros(self.n_simulations)
-        scenario_contributions = {}
-        
-        for i, (scenario_id, results) in enumerate(individual_results.items()):
-            # Use empirical quantiles to transform uniform to scenario distribution
-            quantiles = uniform_samples[:, i]
-            ale_samples_correlated = np.percentile(
-                results.ale_samples,
-                quantiles * 100
-            )
-            
-            total_ale_samples += ale_samples_correlated
-            scenario_contributions[scenario_id] = results.ale_p50
-        
-        # Compute aggregate statistics
-        total_ale_mean = np.mean(total_ale_samples)
-        total_ale_p10 = np.percentile(total_ale_samples, 10)
-        total_ale_p50 = np.percentile(total_ale_samples, 50)
-        total_ale_p90 = np.percentile(total_ale_samples, 90)
-        total_ale_p95 = np.percentile(total_ale_samples, 95)
-        total_ale_p99 = np.percentile(total_ale_samples, 99)
+        # Generate correlated normal random variables. The correlation matrix is
+        # rho everywhere except the unit diagonal, so a one-factor model gives it
+        # exactly: Z_i = sqrt(rho) * W + sqrt(1 - rho) * V_i with W shared.
+        # That is O(n_simulations * n_scenarios), where a Cholesky factor would
+        # cost a (n_scenarios x n_scenarios) product per simulation.
+        if self._normal_buf is None or self._normal_buf.shape != (self.n_simulations, n_scenarios):
+            self._shared_buf = np.empty(self.n_simulations, dtype=self.dtype)
+            self._normal_buf = np.empty((self.n_simulations, n_scenarios), dtype=self.dtype)
+        W = self.rng.standard_normal(dtype=self.dtype, out=self._shared_buf)
+        V = self.rng.standard_normal(dtype=self.dtype, out=self._normal_buf)
         
-        # Rank scenarios
-        sorted_scenarios = sorted(
-            scenario_contributions.items(),
-            key=lambda x: x[1],
-            reverse=True
+        total_ale_samples = self._copula_total(
+            samples, W, V, np.sqrt(correlation), np.sqrt(1 - correlation)
         )
-        
-        top_scenarios = [
-            (sid, ale, (ale / total_ale_p50) * 100 if total_ale_p50 > 0 else 0)
-            for sid, ale in sorted_scenarios
-        ]
-        
-        return AggregatedRiskResults(
-            total_ale_mean=total_ale_mean,
-            total_ale_p10=total_ale_p10,
-            total_ale_p50=total_ale_p50,
-            total_ale_p90=total_ale_p90,
-            total_ale_p95=total_ale_p95,
-            total_ale_p99=total_ale_p99,
-            scenario_contributions=scenario_contributions,
-            top_scenarios=top_scenarios,
-            assumed_correlation=correlation,
-            total_ale_samples=total_ale_samples,
+        return self._summarize(
+            scenario_ids, total_ale_samples, scenario_p50s, correlation, keep_samples
+        )
+
+    def aggregate_from_samples(self,
+                               scenario_inputs: Dict[str, FAIRInputs],
+                               correlated_normals: np.ndarray,
+                               correlation: Optional[float] = None,
+                               keep_samples: bool = True) -> AggregatedRiskResults:
+        """
+        Aggregate scenarios through a Gaussian copula with caller-supplied normals.
+
+        For correlation structures other than the single rho of
+        aggregate_with_correlation, e.g. L @ Z with L the Cholesky factor of
+        a scenario correlation matrix and Z independent standard normals.
+
+        Args:
+            scenario_inputs: Dict of scenario_id -> FAIRInputs
+            correlated_normals: (n_scenarios, n_simulations) standard normals,
+                one row per scenario in scenario_inputs order; not modified
+            correlation: Reported as assumed_correlation; defaults to the mean
+                off-diagonal sample correlation of correlated_normals
+            keep_samples: Return the portfolio ALE samples; pass False when
+                only the summary statistics are needed
+
+        Returns:
+            Aggregated risk results
+        """
+        correlated_normals = np.asarray(correlated_normals)
+        if not np.issubdtype(correlated_normals.dtype, np.floating):
+            raise ValueError(
+                f"correlated_normals must be a float array, got dtype {correlated_normals.dtype}"
+            )
+        n_scenarios = len(scenario_inputs)
+        if correlated_normals.shape != (n_scenarios, self.n_simulations):
+            raise ValueError(
+                f"correlated_normals must have shape ({n_scenarios}, {self.n_simulations}), "
+                f"got {correlated_normals.shape}"
+            )
+        if correlation is None:
+            correlation = 0.0
+            if n_scenarios > 1:
+                corr = np.corrcoef(correlated_normals)
+                correlation = float(corr[~np.eye(n_scenarios, dtype=bool)].mean())
+
+        scenario_ids = list(scenario_inputs.keys())
+        samples, scenario_p50s, _ = self._calculate_scenarios(scenario_inputs)
+
+        # The copula works on (n_simulations, n_scenarios) and may overwrite it,
+        # so take a private copy in the sample dtype; W = 0 leaves Z = V
+        V = np.array(correlated_normals.T, dtype=self.dtype, order='C')
+        W = np.zeros(self.n_simulations, dtype=self.dtype)
+        total_ale_samples = self._copula_total(samples, W, V, 0.0, 1.0)
+        return self._summarize(
+            scenario_ids, total_ale_samples, scenario_p50s, correlation, keep_samples
         )
     
     def calculate_diversification_benefit(self,
@@ -243,14 +566,14 @@ class FAIRAggregator:
         Returns:
             Dictionary with diversification metrics
         """
-        # Calculate individual scenarios
-        individual_sum_p90 = 0
-        for inputs in scenario_inputs.values():
-            results = self.calculator.calculate(inputs)
-            individual_sum_p90 += results.ale_p90
+        # Calculate individual scenarios once; both sides of the comparison use them
+        samples, scenario_p50s, scenario_p90s = self._calculate_scenarios(scenario_inputs)
+        individual_sum_p90 = scenario_p90s.sum()
         
         # Calculate aggregate (independent)
-        agg_results = self.aggregate_independent(scenario_inputs)
+        agg_results = self._aggregate_independent_samples(
+            list(scenario_inputs.keys()), samples, scenario_p50s, keep_samples=False
+        )
         
         # Diversification benefit
         diversification_benefit = individual_sum_p90 - agg_results.total_ale_p90
@@ -264,10 +587,6 @@ class FAIRAggregator:
         }
 
 
-# Add missing import
-from scipy import stats
-
-
 if __name__ == "__main__":
     print("FAIR Risk Aggregation Example\n")
     
@@ -3,15 +3,55 @@ FAIR Risk Calculation Engine
 Implements Monte Carlo simulation for FAIR risk quantification
 """
 
+import copy
+import os
+import sys
 import numpy as np
 from typing import Dict, Optional, Tuple, List
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from fair_distributions import DistributionFitter, DistributionSampler, validate_percentiles
 
+try:
+    import numba
+    from numba import njit, prange
+except ImportError:  # numba is optional; the NumPy combine path is used instead
+    njit = None
+else:
+    # Kernels run on API worker threads: TBB hangs interpreter exit when first
+    # launched off the main thread, and workqueue aborts on concurrent launches.
+    # An explicit NUMBA_THREADING_LAYER_PRIORITY still wins
+    if "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ:
+        numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+# __slots__ dataclasses need Python 3.10+; older interpreters keep a __dict__
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+if njit is not None:
+    # Not disk-cached: this module is imported both as fair_calculator and as
+    # risk_service.fair_calculator, and numba's cache is tied to the module name.
+    # Deliberately not specialized per n_simulations: a closure-constant trip
+    # count measured no faster, and each distinct n would cost a fresh compile
+    @njit(parallel=True, fastmath=True)
+    def _combine_samples(tef, susc, prod, resp, repl, fines, comp, rep, slef, susc_scale,
+                         lef, lm, ale):
+        """
+        Fused LEF / LM / ALE pass over the simulations.
+
+        Same arithmetic as the NumPy path in FAIRCalculator._combine, in one
+        loop with no full-length temporaries. susc_scale folds the percent
+        conversion and the time horizon (which carries through to ALE).
+        """
+        for i in prange(tef.shape[0]):
+            lef[i] = tef[i] * susc[i] * susc_scale
+            lm[i] = prod[i] + resp[i] + repl[i] + (fines[i] + comp[i] + rep[i]) * slef[i]
+            ale[i] = lef[i] * lm[i]
 
-@dataclass
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class FAIRInputs:
     """Structured inputs for FAIR calculation"""
+    # Field order matters: the API builds instances positionally
     # TEF (Threat Event Frequency)
     tef_p10: float
     tef_p50: float
@@ -74,15 +114,15 @@ class FAIRInputs:
     currency: str = 'USD'
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class FAIRResults:
     """Results from FAIR Monte Carlo simulation"""
-    # Raw samples
-    tef_samples: np.ndarray
-    susceptibility_samples: np.ndarray
-    lef_samples: np.ndarray
-    lm_samples: np.ndarray
-    ale_samples: np.ndarray
+    # Raw samples (None unless calculate() was asked to keep them)
+    tef_samples: Optional[np.ndarray]
+    susceptibility_samples: Optional[np.ndarray]
+    lef_samples: Optional[np.ndarray]
+    lm_samples: Optional[np.ndarray]
+    ale_samples: Optional[np.ndarray]
     
     # Summary statistics
     ale_mean: float
@@ -119,32 +159,32 @@ class FAIRResults:
         """Convert to dictionary for JSON serialization"""
         return {
             'ale': {
-                'mean': float(self.ale_mean),
-                'p10': float(self.ale_p10),
-                'p50': float(self.ale_p50),
-                'p90': float(self.ale_p90),
-                'p95': float(self.ale_p95),
-                'p99': float(self.ale_p99),
+                'mean': self.ale_mean,
+                'p10': self.ale_p10,
+                'p50': self.ale_p50,
+                'p90': self.ale_p90,
+                'p95': self.ale_p95,
+                'p99': self.ale_p99,
             },
             'lef': {
-                'mean': float(self.lef_mean),
-                'p10': float(self.lef_p10),
-                'p50': float(self.lef_p50),
-                'p90': float(self.lef_p90),
+                'mean': self.lef_mean,
+                'p10': self.lef_p10,
+                'p50': self.lef_p50,
+                'p90': self.lef_p90,
             },
             'lm': {
-                'mean': float(self.lm_mean),
-                'p10': float(self.lm_p10),
-                'p50': float(self.lm_p50),
-                'p90': float(self.lm_p90),
+                'mean': self.lm_mean,
+                'p10': self.lm_p10,
+                'p50': self.lm_p50,
+                'p90': self.lm_p90,
             },
             'loss_forms': {
-                'productivity': float(self.productivity_p50),
-                'response': float(self.response_p50),
-                'replacement': float(self.replacement_p50),
-                'fines': float(self.fines_p50),
-                'competitive_advantage': float(self.competitive_adv_p50),
-                'reputation': float(self.reputation_p50),
+                'productivity': self.productivity_p50,
+                'response': self.response_p50,
+                'replacement': self.replacement_p50,
+                'fines': self.fines_p50,
+                'competitive_advantage': self.competitive_adv_p50,
+                'reputation': self.reputation_p50,
             },
             'metadata': {
                 'n_simulations': self.n_simulations,
@@ -163,16 +203,93 @@ class FAIRCalculator:
         "poa_p10", "poa_p50", "poa_p90",
     }
 
+    # One independent PCG64 stream per sampled quantity, spawned from the seed
+    RNG_STREAMS = (
+        "contact_freq", "prob_action", "tef", "susceptibility", "loss", "slef",
+    )
+
+    # Loss form -> FAIRInputs field prefix, in sampling (row) order
+    LOSS_FORMS = {
+        "productivity": "productivity",
+        "response": "response",
+        "replacement": "replacement",
+        "fines": "fines",
+        "competitive_advantage": "competitive_adv",
+        "reputation": "reputation",
+    }
 
-    def __init__(self, n_simulations: int = 100000, random_state: Optional[int] = None):
+    def __init__(self, n_simulations: int = 100000, random_state: Optional[int] = None,
+                 dtype: np.dtype = np.float32, block_size: int = 65536):
+        """
+        Args:
+            n_simulations: Monte Carlo samples per run
+            random_state: Seed for reproducible results. A seeded calculator
+                replays the same draws on every call (sensitivity sweeps and
+                the API rely on that); an unseeded one draws afresh per call.
+            dtype: Storage type for every sample array. The pipeline is
+                memory-bound, so float32 roughly halves its cost; summary
+                statistics are always reported as float64.
+            block_size: Simulations combined per block on the NumPy path
+                (without numba), sized to keep each block's operands in cache
+        """
         self.n_simulations = n_simulations
         self.random_state = random_state
-        self.rng = np.random.RandomState(random_state)
+        self.dtype = np.dtype(dtype)
+        self.block_size = block_size
+        self._seed_seq = np.random.SeedSequence(random_state)
+        self._child_seeds = self._spawn_streams()
+        # Shared by every always-zero component; read-only so it can't be mutated
+        self._zeros = np.zeros(n_simulations, dtype=self.dtype)
+        self._zeros.flags.writeable = False
+
+    def _spawn_streams(self) -> Dict[str, np.random.SeedSequence]:
+        """A new, independent child seed for each RNG stream"""
+        return dict(zip(self.RNG_STREAMS, self._seed_seq.spawn(len(self.RNG_STREAMS))))
+
+    def _for_run(self) -> "FAIRCalculator":
+        """
+        The calculator one calculate() / sensitivity call samples with.
+
+        Seeded: self, so every call replays the same draws. Unseeded: a copy
+        with freshly spawned streams, so calls differ from one another while
+        the streams still replay within the call. A copy rather than new
+        seeds on self keeps a shared calculator safe across threads.
+        """
+        if self.random_state is not None:
+            return self
+        run = copy.copy(self)
+        run._child_seeds = self._spawn_streams()
+        return run
+
+    def _stream(self, name: str) -> np.random.Generator:
+        """Generator for one sampled quantity; replays the same draws within a run"""
+        return np.random.default_rng(self._child_seeds[name])
+
+    def _constant(self, value: float) -> np.ndarray:
+        """Samples for a point estimate (p10 == p50 == p90); no fit or RNG draw needed"""
+        return np.full(self.n_simulations, value, dtype=self.dtype)
+
+    def _standard_normal(self, name: str, draws: Optional[Dict] = None) -> np.ndarray:
+        """
+        One run's worth of standard normals from a stream, in the sample dtype.
+
+        With a draws dict the normals are generated once and each call gets a
+        fresh copy, since the lognormal transform works in place.
+        """
+        if draws is None:
+            return self._stream(name).standard_normal(self.n_simulations, dtype=self.dtype)
+        z = draws.get(name)
+        if z is None:
+            z = draws[name] = self._stream(name).standard_normal(self.n_simulations, dtype=self.dtype)
+        return z.copy()
     
-    def calculate(self, inputs: FAIRInputs) -> FAIRResults:
+    def calculate(self, inputs: FAIRInputs, keep_samples: bool = False) -> FAIRResults:
         """
         Run FAIR Monte Carlo simulation.
         
+        The raw sample arrays are only stored on the results when
+        keep_samples is True; otherwise they are None.
+        
         Process:
         1. Sample TEF distribution
         2. Sample Susceptibility distribution
@@ -181,63 +298,61 @@ class FAIRCalculator:
         5. Calculate lm = Primary + (Secondary × SLEF)
         6. Calculate ALE = LEF × lm
         """
+        return self._for_run()._calculate(inputs, keep_samples)
+
+    def _calculate(self, inputs: FAIRInputs, keep_samples: bool) -> FAIRResults:
         # Validate inputs
         self._validate_inputs(inputs)
         
-        # 1. Sample TEF
-        tef_samples = self._sample_tef(inputs)
-        
-        # 2. Sample Susceptibility
-        susc_samples = self._sample_susceptibility(inputs)
-        
-        # 3. Calculate LEF = TEF × Susceptibility
-        lef_samples = tef_samples * (susc_samples / 100.0)
-        
-        # 4. Sample loss magnitudes
-        loss_samples = self._sample_loss_magnitudes(inputs)
+        # 1-2, 4. Sample TEF, Susceptibility, loss magnitudes and SLEF
+        samples = self._sample_components(inputs)
+        tef_samples = samples['tef']
+        susc_samples = samples['susceptibility']
+        loss_samples = {form: samples[form] for form in self.LOSS_FORMS}
         
-        # 5. Calculate lm
-        lm_samples = self._calculate_lm(loss_samples, inputs)
+        # 3, 5-6. LEF = TEF × Susceptibility, lm, ALE = LEF × lm
+        lef_samples, lm_samples, ale_samples = self._combine(samples, inputs)
         
-        # 6. Calculate ALE = LEF × lm
-        ale_samples = lef_samples * lm_samples
-        
-        # Adjust for time horizon
-        if inputs.time_horizon_years != 1.0:
-            ale_samples = ale_samples * inputs.time_horizon_years
-            lef_samples = lef_samples * inputs.time_horizon_years
+        # Compute summary statistics, one quantile call per array; stored as
+        # Python floats so to_dict() can hand them straight to the JSON encoder
+        ale_q = np.quantile(ale_samples, [0.10, 0.50, 0.90, 0.95, 0.99]).tolist()
+        lef_q = np.quantile(lef_samples, [0.10, 0.50, 0.90]).tolist()
+        lm_q = np.quantile(lm_samples, [0.10, 0.50, 0.90]).tolist()
+        loss_p50 = {
+            form: 0.0 if x is self._zeros else np.median(x).item()
+            for form, x in loss_samples.items()
+        }
         
-        # Compute summary statistics
         results = FAIRResults(
-            tef_samples=tef_samples,
-            susceptibility_samples=susc_samples,
-            lef_samples=lef_samples,
-            lm_samples=lm_samples,
-            ale_samples=ale_samples,
+            tef_samples=tef_samples if keep_samples else None,
+            susceptibility_samples=susc_samples if keep_samples else None,
+            lef_samples=lef_samples if keep_samples else None,
+            lm_samples=lm_samples if keep_samples else None,
+            ale_samples=ale_samples if keep_samples else None,
             
-            ale_mean=np.mean(ale_samples),
-            ale_p10=np.percentile(ale_samples, 10),
-            ale_p50=np.percentile(ale_samples, 50),
-            ale_p90=np.percentile(ale_samples, 90),
-            ale_p95=np.percentile(ale_samples, 95),
-            ale_p99=np.percentile(ale_samples, 99),
+            ale_mean=np.mean(ale_samples, dtype=np.float64).item(),
+            ale_p10=ale_q[0],
+            ale_p50=ale_q[1],
+            ale_p90=ale_q[2],
+            ale_p95=ale_q[3],
+            ale_p99=ale_q[4],
             
-            lef_mean=np.mean(lef_samples),
-            lef_p10=np.percentile(lef_samples, 10),
-            lef_p50=np.percentile(lef_samples, 50),
-            lef_p90=np.percentile(lef_samples, 90),
+            lef_mean=np.mean(lef_samples, dtype=np.float64).item(),
+            lef_p10=lef_q[0],
+            lef_p50=lef_q[1],
+            lef_p90=lef_q[2],
             
-            lm_mean=np.mean(lm_samples),
-            lm_p10=np.percentile(lm_samples, 10),
-            lm_p50=np.percentile(lm_samples, 50),
-            lm_p90=np.percentile(lm_samples, 90),
+            lm_mean=np.mean(lm_samples, dtype=np.float64).item(),
+            lm_p10=lm_q[0],
+            lm_p50=lm_q[1],
+            lm_p90=lm_q[2],
             
-            productivity_p50=np.percentile(loss_samples['productivity'], 50),
-            response_p50=np.percentile(loss_samples['response'], 50),
-            replacement_p50=np.percentile(loss_samples['replacement'], 50),
-            fines_p50=np.percentile(loss_samples['fines'], 50),
-            competitive_adv_p50=np.percentile(loss_samples['competitive_advantage'], 50),
-            reputation_p50=np.percentile(loss_samples['reputation'], 50),
+            productivity_p50=loss_p50['productivity'],
+            response_p50=loss_p50['response'],
+            replacement_p50=loss_p50['replacement'],
+            fines_p50=loss_p50['fines'],
+            competitive_adv_p50=loss_p50['competitive_advantage'],
+            reputation_p50=loss_p50['reputation'],
             
             n_simulations=self.n_simulations,
             time_horizon_years=inputs.time_horizon_years,
@@ -246,6 +361,89 @@ class FAIRCalculator:
         
         return results
 
+    def _sample_components(self, inputs: FAIRInputs,
+                           draws: Optional[Dict] = None) -> Dict[str, np.ndarray]:
+        """Sample every input distribution, keyed by RNG stream / component name"""
+        samples = {
+            'tef': self._sample_tef(inputs, draws),
+            'susceptibility': self._sample_susceptibility(inputs),
+        }
+        samples.update(self._sample_loss_magnitudes(inputs, draws))
+        samples['slef'] = self._sample_slef(inputs)
+        return samples
+
+    def _sample_component(self, component: str, inputs: FAIRInputs,
+                          draws: Optional[Dict] = None,
+                          forms: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """Re-sample a single component from its own stream (only `forms` for losses)"""
+        if component == 'tef':
+            return {'tef': self._sample_tef(inputs, draws)}
+        if component == 'susceptibility':
+            return {'susceptibility': self._sample_susceptibility(inputs)}
+        if component == 'slef':
+            return {'slef': self._sample_slef(inputs)}
+        # Loss forms share one stream, so unchanged forms come back identical
+        return self._sample_loss_magnitudes(inputs, draws, forms)
+
+    def _combine(self, samples: Dict[str, np.ndarray],
+                 inputs: FAIRInputs) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Combine sampled components into (LEF, lm, ALE) for the time horizon"""
+        # Percent -> fraction and the time horizon in one factor: ALE×T = (LEF×T)×LM
+        susc_scale = 0.01 * inputs.time_horizon_years
+        
+        if njit is not None:
+            lef_samples = np.empty(self.n_simulations, dtype=self.dtype)
+            lm_samples = np.empty(self.n_simulations, dtype=self.dtype)
+            ale_samples = np.empty(self.n_simulations, dtype=self.dtype)
+            _combine_samples(
+                samples['tef'], samples['susceptibility'],
+                samples['productivity'], samples['response'], samples['replacement'],
+                samples['fines'], samples['competitive_advantage'], samples['reputation'],
+                samples['slef'], float(susc_scale),
+                lef_samples, lm_samples, ale_samples,
+            )
+            return lef_samples, lm_samples, ale_samples
+        
+        lef_samples = np.empty(self.n_simulations, dtype=self.dtype)
+        lm_samples = np.empty(self.n_simulations, dtype=self.dtype)
+        ale_samples = np.empty(self.n_simulations, dtype=self.dtype)
+        scratch = np.empty(min(self.block_size, self.n_simulations), dtype=self.dtype)
+        
+        # In-place ops block by block, so each block's operands stay in cache
+        # and the only temporary is one block-sized scratch buffer
+        for start in range(0, self.n_simulations, self.block_size):
+            block = slice(start, start + self.block_size)
+            lef = lef_samples[block]
+            np.multiply(samples['tef'][block], samples['susceptibility'][block], out=lef)
+            lef *= susc_scale
+            lm = lm_samples[block]
+            self._calculate_lm(samples, block, lm, scratch[:lm.shape[0]])
+            ale = ale_samples[block]
+            np.multiply(lef, lm, out=ale)
+        
+        return lef_samples, lm_samples, ale_samples
+
+    @classmethod
+    def _loss_form_for(cls, factor: str) -> Optional[str]:
+        """Loss form an input field belongs to (None for non-loss fields)"""
+        for form, prefix in cls.LOSS_FORMS.items():
+            if factor.startswith(prefix + '_'):
+                return form
+        return None
+
+    @classmethod
+    def _component_for(cls, factor: str) -> Optional[str]:
+        """Component whose distribution depends on an input field (None if none does)"""
+        if factor.startswith(('tef_', 'contact_freq_', 'prob_action_')) or factor in ('zero_inflation', 'p_zero'):
+            return 'tef'
+        if factor.startswith('susc_'):
+            return 'susceptibility'
+        if factor.startswith('slef_'):
+            return 'slef'
+        if factor.startswith(tuple(prefix + '_' for prefix in cls.LOSS_FORMS.values())):
+            return 'loss'
+        return None
+
     def _apply_variation(value: float, pct: float, is_percent: bool) -> float:
         """Multiply by (1±pct%) and clamp if percentage."""
         new_val = value * (1.0 + pct / 100.0)
@@ -287,7 +485,7 @@ class FAIRCalculator:
             if not is_valid:
                 raise ValueError(f"Invalid SLEF percentiles: {errors}")
     
-    def _sample_tef(self, inputs: FAIRInputs) -> np.ndarray:
+    def _sample_tef(self, inputs: FAIRInputs, draws: Optional[Dict] = None) -> np.ndarray:
         """Sample Threat Event Frequency distribution"""
         if inputs.tef_decompose:
             # TEF = Contact Frequency × Probability of Action
@@ -297,24 +495,29 @@ class FAIRCalculator:
                     inputs.contact_freq_p10, inputs.contact_freq_p50, inputs.contact_freq_p90
                 )
                 cf_samples = DistributionSampler.sample_poisson(
-                    lambda_cf, self.n_simulations, self.random_state
+                    lambda_cf, self.n_simulations, self._stream("contact_freq")
                 )
+            elif inputs.contact_freq_p10 == inputs.contact_freq_p50 == inputs.contact_freq_p90:
+                cf_samples = self._constant(inputs.contact_freq_p50)
             else:  # lognormal
                 loc, mu, sigma = DistributionFitter.fit_lognormal(
                     inputs.contact_freq_p10, inputs.contact_freq_p50, inputs.contact_freq_p90
                 )
-                cf_samples = DistributionSampler.sample_lognormal(
-                    loc, mu, sigma, self.n_simulations, self.random_state
+                cf_samples = DistributionSampler.sample_lognormal_from_z(
+                    loc, mu, sigma, self._standard_normal("contact_freq", draws)
                 )
             
             # Sample Probability of Action
-            alpha, beta = DistributionFitter.fit_beta_pert(
-                inputs.prob_action_p10, inputs.prob_action_p50, inputs.prob_action_p90,
-                0, 100
-            )
-            poa_samples = DistributionSampler.sample_beta(
-                alpha, beta, 0, 100, self.n_simulations, self.random_state + 1 if self.random_state else None
-            ) / 100.0
+            if inputs.prob_action_p10 == inputs.prob_action_p50 == inputs.prob_action_p90:
+                poa_samples = self._constant(inputs.prob_action_p50 / 100.0)
+            else:
+                alpha, beta = DistributionFitter.fit_beta_pert(
+                    inputs.prob_action_p10, inputs.prob_action_p50, inputs.prob_action_p90,
+                    0, 100
+                )
+                poa_samples = DistributionSampler.sample_beta(
+                    alpha, beta, 0, 100, self.n_simulations, self._stream("prob_action")
+                ) / 100.0
             
             # Combine: TEF = CF × PoA
             tef_samples = cf_samples * poa_samples
@@ -326,196 +529,199 @@ class FAIRCalculator:
                     inputs.tef_p10, inputs.tef_p50, inputs.tef_p90, inputs.p_zero
                 )
                 tef_samples = DistributionSampler.sample_zero_inflated_poisson(
-                    p_zero, lambda_param, self.n_simulations, self.random_state
+                    p_zero, lambda_param, self.n_simulations, self._stream("tef")
                 )
             elif inputs.tef_model == 'poisson':
                 lambda_param = DistributionFitter.fit_poisson_from_percentiles(
                     inputs.tef_p10, inputs.tef_p50, inputs.tef_p90
                 )
                 tef_samples = DistributionSampler.sample_poisson(
-                    lambda_param, self.n_simulations, self.random_state
+                    lambda_param, self.n_simulations, self._stream("tef")
                 )
+            elif inputs.tef_p10 == inputs.tef_p50 == inputs.tef_p90:
+                tef_samples = self._constant(inputs.tef_p50)
             else:  # lognormal
                 loc, mu, sigma = DistributionFitter.fit_lognormal(
                     max(0.01, inputs.tef_p10), 
                     max(0.01, inputs.tef_p50), 
                     max(0.01, inputs.tef_p90)
                 )
-                tef_samples = DistributionSampler.sample_lognormal(
-                    loc, mu, sigma, self.n_simulations, self.random_state
+                tef_samples = DistributionSampler.sample_lognormal_from_z(
+                    loc, mu, sigma, self._standard_normal("tef", draws)
                 )
         
-        return tef_samples
+        return tef_samples.astype(self.dtype, copy=False)
     
     def _sample_susceptibility(self, inputs: FAIRInputs) -> np.ndarray:
         """Sample Susceptibility distribution (Beta-PERT)"""
+        if inputs.susc_p10 == inputs.susc_p50 == inputs.susc_p90:
+            return self._constant(inputs.susc_p50)
         alpha, beta = DistributionFitter.fit_beta_pert(
             inputs.susc_p10, inputs.susc_p50, inputs.susc_p90, 0, 100
         )
         samples = DistributionSampler.sample_beta(
-            alpha, beta, 0, 100, self.n_simulations, 
-            self.random_state + 10 if self.random_state else None
+            alpha, beta, 0, 100, self.n_simulations, self._stream("susceptibility")
         )
-        return samples
+        return samples.astype(self.dtype, copy=False)
 
-    def _sample_loss_magnitudes(self, inputs: FAIRInputs) -> Dict[str, np.ndarray]:
-        """Sample all 6 forms of loss (lognormal distributions with optional zero-inflation)."""
-        loss_samples: Dict[str, np.ndarray] = {}
-
-        def sample_loss(
-                p10: float,
-                p50: float,
-                p90: float,
-                seed_offset: int,
-                p_zero: Optional[float] = None,
-        ) -> np.ndarray:
-            """
-            Sample a single loss form.
-
-            - If p50 == 0      -> always zero
-            - If p10 == 0      -> treat as zero-inflated lognormal
-            - If p10 > 0       -> standard 3-point lognormal fit
-            """
-            # All-zero distribution if median is zero
-            if p50 == 0:
-                return np.zeros(self.n_simulations)
-
-            rng_seed = (self.random_state + seed_offset) if self.random_state is not None else None
-
-            # Zero-inflated case when P10 == 0 but median > 0
-            if p10 == 0:
-                # Default zero-rate is 10% if not overridden
-                local_p_zero = 0.10 if p_zero is None else float(p_zero)
-
-                # Map overall percentiles (50th and 90th) to conditional percentiles
-                # of the positive component:
-                #   q* = (q - p_zero) / (1 - p_zero)
-                denom = max(1e-6, 1.0 - local_p_zero)
-                q50_star = (0.50 - local_p_zero) / denom
-                q90_star = (0.90 - local_p_zero) / denom
-
-                # Keep q* in a valid open interval
-                q50_star = float(np.clip(q50_star, 1e-6, 1 - 1e-6))
-                q90_star = float(np.clip(q90_star, q50_star + 1e-6, 1 - 1e-6))
-
-                # Use the overall p50/p90 as the positive quantiles
-                x50_star = max(1.0, p50)
-                x90_star = max(1.0, p90)
-
-                loc, mu, sigma = DistributionFitter.fit_lognormal_from_two_quantiles(
-                    x_q1=x50_star,
-                    q1=q50_star,
-                    x_q2=x90_star,
-                    q2=q90_star,
-                )
+    def _sample_loss_magnitudes(self, inputs: FAIRInputs,
+                                draws: Optional[Dict] = None,
+                                forms: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Sample all 6 forms of loss (lognormal distributions with optional zero-inflation).
+
+        The forms are fitted into parameter arrays and sampled together as
+        one (6, n_simulations) block; each returned array is a row view, or
+        the shared zeros array for an all-zero form.
+
+        With a draws dict the normals and zero-rate uniforms are generated
+        once and replayed, and `forms` restricts sampling to those rows.
+        """
+        all_forms = list(self.LOSS_FORMS)
+        forms = all_forms if forms is None else forms
+        n_forms = len(forms)
+        locs = np.zeros(n_forms)
+        mus = np.zeros(n_forms)
+        sigmas = np.zeros(n_forms)
+        p_zeros = np.zeros(n_forms)
+        always_zero = np.zeros(n_forms, dtype=bool)
+
+        for i, form in enumerate(forms):
+            params = self._fit_loss_form(form, inputs)
+            if params is None:
+                always_zero[i] = True
+            else:
+                locs[i], mus[i], sigmas[i], p_zeros[i] = params
+
+        # Every row is drawn even for all-zero forms, so a form's draws do
+        # not depend on which other forms are active
+        loss_draws = {} if draws is None else draws.setdefault("loss", {})
+        if "z" not in loss_draws:
+            loss_draws["rng"] = self._stream("loss")
+            loss_draws["z"] = loss_draws["rng"].standard_normal(
+                (len(all_forms), self.n_simulations), dtype=self.dtype
+            )
+        z = loss_draws["z"]
+        if forms is not all_forms:
+            z = z[[all_forms.index(form) for form in forms]]  # fancy indexing copies
+        elif draws is not None:
+            z = z.copy()
+        samples = DistributionSampler.sample_lognormal_from_z(
+            locs[:, None], mus[:, None], sigmas[:, None], z,
+        )
 
-                return DistributionSampler.sample_zero_inflated_lognormal(
-                    loc=loc,
-                    mu=mu,
-                    sigma=sigma,
-                    p_zero=local_p_zero,
-                    size=self.n_simulations,
-                    random_state=rng_seed,
+        if p_zeros.any():
+            if "u" not in loss_draws:
+                loss_draws["u"] = loss_draws["rng"].random(
+                    loss_draws["z"].shape, dtype=self.dtype
                 )
+            u = loss_draws["u"]
+            if forms is not all_forms:
+                u = u[[all_forms.index(form) for form in forms]]
+            samples[u < p_zeros[:, None]] = 0.0
 
-            # Standard lognormal fit if P10 > 0
-            p10_adj = max(1e-6, p10)
-            p50_adj = max(1e-6, p50)
-            p90_adj = max(1e-6, p90)
-
-            loc, mu, sigma = DistributionFitter.fit_lognormal(p10_adj, p50_adj, p90_adj)
-            return DistributionSampler.sample_lognormal(
-                loc=loc,
-                mu=mu,
-                sigma=sigma,
-                size=self.n_simulations,
-                random_state=rng_seed,
+        return {
+            form: self._zeros if always_zero[i] else samples[i]
+            for i, form in enumerate(forms)
+        }
+
+    def _fit_loss_form(self, form: str,
+                       inputs: FAIRInputs) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Fit a single loss form to (loc, mu, sigma, p_zero).
+
+        - If p50 == 0      -> always zero (returns None)
+        - If p10 == 0      -> treat as zero-inflated lognormal
+        - If p10 > 0       -> standard 3-point lognormal fit
+        """
+        prefix = self.LOSS_FORMS[form]
+        p10 = getattr(inputs, f"{prefix}_p10")
+        p50 = getattr(inputs, f"{prefix}_p50")
+        p90 = getattr(inputs, f"{prefix}_p90")
+        p_zero = getattr(inputs, f"{prefix}_p_zero")
+
+        # All-zero distribution if median is zero
+        if p50 == 0:
+            return None
+
+        # Zero-inflated case when P10 == 0 but median > 0
+        if p10 == 0:
+            # Default zero-rate is 10% if not overridden
+            local_p_zero = 0.10 if p_zero is None else float(p_zero)
+
+            # Map overall percentiles (50th and 90th) to conditional percentiles
+            # of the positive component:
+            #   q* = (q - p_zero) / (1 - p_zero)
+            denom = max(1e-6, 1.0 - local_p_zero)
+            q50_star = (0.50 - local_p_zero) / denom
+            q90_star = (0.90 - local_p_zero) / denom
+
+            # Keep q* in a valid open interval
+            q50_star = float(np.clip(q50_star, 1e-6, 1 - 1e-6))
+            q90_star = float(np.clip(q90_star, q50_star + 1e-6, 1 - 1e-6))
+
+            # Use the overall p50/p90 as the positive quantiles
+            x50_star = max(1.0, p50)
+            x90_star = max(1.0, p90)
+
+            loc, mu, sigma = DistributionFitter.fit_lognormal_from_two_quantiles(
+                x50_star, q50_star, x90_star, q90_star,
             )
 
-        # Primary losses
-        loss_samples["productivity"] = sample_loss(
-            inputs.productivity_p10,
-            inputs.productivity_p50,
-            inputs.productivity_p90,
-            seed_offset=20,
-            p_zero=inputs.productivity_p_zero,
-        )
-        loss_samples["response"] = sample_loss(
-            inputs.response_p10,
-            inputs.response_p50,
-            inputs.response_p90,
-            seed_offset=21,
-            p_zero=inputs.response_p_zero,
-        )
-        loss_samples["replacement"] = sample_loss(
-            inputs.replacement_p10,
-            inputs.replacement_p50,
-            inputs.replacement_p90,
-            seed_offset=22,
-            p_zero=inputs.replacement_p_zero,
-        )
+            # Same clamp as DistributionSampler.sample_zero_inflated_lognormal
+            return loc, mu, sigma, float(np.clip(local_p_zero, 0.0, 0.49))
 
-        # Secondary losses
-        loss_samples["fines"] = sample_loss(
-            inputs.fines_p10,
-            inputs.fines_p50,
-            inputs.fines_p90,
-            seed_offset=23,
-            p_zero=inputs.fines_p_zero,
-        )
-        loss_samples["competitive_advantage"] = sample_loss(
-            inputs.competitive_adv_p10,
-            inputs.competitive_adv_p50,
-            inputs.competitive_adv_p90,
-            seed_offset=24,
-            p_zero=inputs.competitive_adv_p_zero,
-        )
-        loss_samples["reputation"] = sample_loss(
-            inputs.reputation_p10,
-            inputs.reputation_p50,
-            inputs.reputation_p90,
-            seed_offset=25,
-            p_zero=inputs.reputation_p_zero,
-        )
+        # Standard lognormal fit if P10 > 0
+        p10_adj = max(1e-6, p10)
+        p50_adj = max(1e-6, p50)
+        p90_adj = max(1e-6, p90)
 
-        return loss_samples
+        loc, mu, sigma = DistributionFitter.fit_lognormal(p10_adj, p50_adj, p90_adj)
+        return loc, mu, sigma, 0.0
 
-    def _calculate_lm(self, loss_samples: Dict[str, np.ndarray], 
-                       inputs: FAIRInputs) -> np.ndarray:
+    def _calculate_lm(self, samples: Dict[str, np.ndarray], block: slice,
+                      lm: np.ndarray, scratch: np.ndarray) -> np.ndarray:
         """
-        Calculate Single Loss Event Exposure.
+        Calculate Single Loss Event Exposure for one block of simulations.
         LM = Primary Loss + (Secondary Loss × SLEF)
+        
+        Writes into lm, using scratch (same length) for the secondary term.
         """
+        # Forms known to be all-zero (the shared zeros array) are skipped
+        def nonzero(*forms):
+            return [samples[form][block] for form in forms if samples[form] is not self._zeros]
+        
         # Primary loss (evaluated for every event; may be $0)
-        primary = (
-            loss_samples['productivity'] +
-            loss_samples['response'] +
-            loss_samples['replacement']
-        )
+        lm.fill(0.0)
+        for loss in nonzero('productivity', 'response', 'replacement'):
+            lm += loss
         
         # Secondary loss (conditional on SLEF)
-        secondary = (
-            loss_samples['fines'] +
-            loss_samples['competitive_advantage'] +
-            loss_samples['reputation']
-        )
+        secondary = nonzero('fines', 'competitive_advantage', 'reputation')
+        
+        # LM = Primary + (Secondary × SLEF), accumulated in the scratch buffer
+        if secondary and samples['slef'] is not self._zeros:
+            np.copyto(scratch, secondary[0])
+            for loss in secondary[1:]:
+                scratch += loss
+            scratch *= samples['slef'][block]
+            lm += scratch
         
-        # Sample SLEF
+        return lm
+
+    def _sample_slef(self, inputs: FAIRInputs) -> np.ndarray:
+        """Sample Secondary Loss Event Frequency as a fraction in [0, 1]"""
+        if inputs.slef_p50 > 0 and inputs.slef_p10 == inputs.slef_p50 == inputs.slef_p90:
+            return self._constant(inputs.slef_p50 / 100.0)
         if inputs.slef_p50 > 0:
             alpha, beta = DistributionFitter.fit_beta_pert(
                 inputs.slef_p10, inputs.slef_p50, inputs.slef_p90, 0, 100
             )
-            slef_samples = DistributionSampler.sample_beta(
-                alpha, beta, 0, 100, self.n_simulations,
-                self.random_state + 30 if self.random_state else None
+            samples = DistributionSampler.sample_beta(
+                alpha, beta, 0, 100, self.n_simulations, self._stream("slef")
             ) / 100.0
-        else:
-            slef_samples = np.zeros(self.n_simulations)
-        
-        # LM = Primary + (Secondary × SLEF)
-        lm = primary + (secondary * slef_samples)
-        
-        return lm
+            return samples.astype(self.dtype, copy=False)
+        return self._zeros
     
     def sensitivity_analysis(self, inputs: FAIRInputs, 
                            factor: str, 
@@ -531,50 +737,89 @@ class FAIRCalculator:
         Returns:
             Dictionary with ALE results at -variation%, baseline, +variation%
         """
-        # Get baseline
-        baseline_results = self.calculate(inputs)
-        baseline_ale = baseline_results.ale_p50
-        # is_percent = factor in self.PERCENT_FIELDS
-
-        # down_inputs = self.copy.deepcopy(inputs)
-        # setattr(
-        #     down_inputs, factor,
-        #     self._apply_variation(getattr(inputs, factor), -variation_pct, is_percent)
-        # )
-        #
-        # up_inputs = self.copy.deepcopy(inputs)
-        # setattr(
-        #     up_inputs, factor,
-        #     self._apply_variation(getattr(inputs, factor), variation_pct, is_percent)
-        # )
-        # Vary factor downward
-        inputs_down = self._adjust_factor(inputs, factor, -variation_pct)
-        results_down = self.calculate(inputs_down)
-        
-        # Vary factor upward
-        inputs_up = self._adjust_factor(inputs, factor, variation_pct)
-        results_up = self.calculate(inputs_up)
-        
-        # Calculate elasticity: % change in ALE / % change in factor
-        elasticity_down = ((results_down.ale_p50 - baseline_ale) / baseline_ale) / (-variation_pct / 100)
-        elasticity_up = ((results_up.ale_p50 - baseline_ale) / baseline_ale) / (variation_pct / 100)
+        return self.sensitivity_analysis_batch(inputs, [factor], variation_pct)[0]
+
+    def sensitivity_analysis_batch(self, inputs: FAIRInputs,
+                                   factors: List[str],
+                                   variation_pct: float = 20.0) -> List[Dict]:
+        """
+        Perform sensitivity analysis on several FAIR factors in one run.
         
-        return {
-            'factor': factor,
-            'baseline_ale': baseline_ale,
-            'ale_down': results_down.ale_p50,
-            'ale_up': results_up.ale_p50,
-            'elasticity_down': elasticity_down,
-            'elasticity_up': elasticity_up,
-            'average_elasticity': (elasticity_down + elasticity_up) / 2,
-        }
+        The baseline is simulated once. Each ±variation_pct perturbation
+        re-samples only the component its factor feeds (only the one row for
+        a loss-form factor), and reuses every other sample array. Lognormal
+        components replay the baseline's normal draws rather than
+        regenerating them, so all variants share common random numbers.
+        
+        Args:
+            inputs: Base FAIR inputs
+            factors: Factors to vary (e.g., ['tef_p50', 'susc_p50'])
+            variation_pct: Percentage to vary each factor (+/-)
+        
+        Returns:
+            One sensitivity_analysis() dictionary per factor, in order
+        """
+        return self._for_run()._sensitivity_analysis_batch(inputs, factors, variation_pct)
+
+    def _sensitivity_analysis_batch(self, inputs: FAIRInputs, factors: List[str],
+                                    variation_pct: float) -> List[Dict]:
+        if variation_pct <= 0:
+            raise ValueError("variation_pct must be positive")
+        self._validate_inputs(inputs)
+        draws: Dict = {}
+        baseline = self._sample_components(inputs, draws)
+        
+        # Row 0 is the baseline ALE, then (down, up) for each factor
+        ale_rows = np.empty((1 + 2 * len(factors), self.n_simulations), dtype=self.dtype)
+        ale_rows[0] = self._combine(baseline, inputs)[2]
+        
+        row = 1
+        for factor in factors:
+            component = self._component_for(factor)
+            form = self._loss_form_for(factor)
+            for pct_change in (-variation_pct, variation_pct):
+                adjusted = self._adjust_factor(inputs, factor, pct_change)
+                self._validate_inputs(adjusted)
+                samples = baseline
+                if component is not None:
+                    samples = dict(baseline)
+                    samples.update(self._sample_component(
+                        component, adjusted, draws, [form] if form else None
+                    ))
+                ale_rows[row] = self._combine(samples, adjusted)[2]
+                row += 1
+        
+        # Plain floats, not NumPy scalars, so results serialize anywhere
+        ale_p50s = np.quantile(ale_rows, 0.50, axis=1).tolist()
+        baseline_ale = ale_p50s[0]
+        
+        results = []
+        for i, factor in enumerate(factors):
+            ale_down, ale_up = ale_p50s[1 + 2 * i], ale_p50s[2 + 2 * i]
+            
+            # Calculate elasticity: % change in ALE / % change in factor.
+            # Undefined (NaN) when the baseline median ALE is 0
+            if baseline_ale == 0:
+                elasticity_down = elasticity_up = float('nan')
+            else:
+                elasticity_down = ((ale_down - baseline_ale) / baseline_ale) / (-variation_pct / 100)
+                elasticity_up = ((ale_up - baseline_ale) / baseline_ale) / (variation_pct / 100)
+            
+            results.append({
+                'factor': factor,
+                'baseline_ale': baseline_ale,
+                'ale_down': ale_down,
+                'ale_up': ale_up,
+                'elasticity_down': elasticity_down,
+                'elasticity_up': elasticity_up,
+                'average_elasticity': (elasticity_down + elasticity_up) / 2,
+            })
+        
+        return results
     
     def _adjust_factor(self, inputs: FAIRInputs, factor: str, pct_change: float) -> FAIRInputs:
         """Create a copy of inputs with one factor adjusted"""
-        import copy
-        inputs_copy = copy.deepcopy(inputs)
-        
-        current_value = getattr(inputs_copy, factor)
+        current_value = getattr(inputs, factor)
         new_value = current_value * (1 + pct_change / 100)
         # Clip percentage-based factors to [0, 100] range
         is_percent = factor in ['vulnerability', 'slef']
@@ -584,9 +829,8 @@ class FAIRCalculator:
             # Prevent negative values for non-percentage factors
             new_value = max(0, new_value)
 
-        setattr(inputs_copy, factor, new_value)
-        
-        return inputs_copy
+        # FAIRInputs holds only scalars, so a shallow replace is a full copy
+        return replace(inputs, **{factor: new_value})
 
 
 if __name__ == "__main__":
@@ -662,8 +906,8 @@ if __name__ == "__main__":
     print("=" * 60)
     
     factors = ['tef_p50', 'susc_p50', 'productivity_p50', 'fines_p50']
-    for factor in factors:
-        sensitivity = calculator.sensitivity_analysis(inputs, factor, variation_pct=20)
+    sensitivities = calculator.sensitivity_analysis_batch(inputs, factors, variation_pct=20)
+    for factor, sensitivity in zip(factors, sensitivities):
         print(f"\n{factor}:")
         print(f"  Baseline ALE: ${sensitivity['baseline_ale']:,.0f}")
         print(f"  ALE at -20%:  ${sensitivity['ale_down']:,.0f}")
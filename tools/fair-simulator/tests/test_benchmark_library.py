@@ -0,0 +1,24 @@
+# tests/test_benchmark_library.py
+
+import pytest
+
+from risk_service.benchmark_library import get_lef_benchmark, get_lm_benchmark  # adjust package path if needed
+
+
+@pytest.mark.parametrize("lookup", [get_lef_benchmark, get_lm_benchmark])
+def test_benchmarks_are_read_only_all_the_way_down(lookup):
+    result = lookup("Healthcare", "$1B to $10B")
+
+    for key in ("industry", "revenue", "overall_baseline"):
+        assert result[key] is not None
+        with pytest.raises(TypeError):
+            result[key]["source"] = "tampered"
+    assert lookup()["overall_baseline"]["source"] != "tampered"
+
+
+def test_unknown_industry_fallback_is_read_only():
+    industry = get_lef_benchmark("No Such Industry")["industry"]
+
+    assert industry["probability"] is None
+    with pytest.raises(TypeError):
+        industry["probability"] = 1.0
@@ -0,0 +1,98 @@
+# tests/test_fair_aggregation.py
+
+import numpy as np
+import pytest
+
+from risk_service.fair_calculator import FAIRInputs  # adjust package path if needed
+from risk_service.fair_aggregation import FAIRAggregator, validate_scenarios
+
+
+def _inputs(**overrides):
+    fields = dict(
+        tef_p10=1.0, tef_p50=3.0, tef_p90=6.0,
+        susc_p10=10.0, susc_p50=30.0, susc_p90=60.0,
+        productivity_p10=10_000, productivity_p50=50_000, productivity_p90=200_000,
+        fines_p10=0.0, fines_p50=20_000, fines_p90=100_000,
+        slef_p10=10.0, slef_p50=20.0, slef_p90=40.0,
+    )
+    fields.update(overrides)
+    return FAIRInputs(**fields)
+
+
+def test_validate_scenarios_names_every_failing_scenario():
+    scenarios = {
+        "ok": _inputs(),
+        "bad_tef": _inputs(tef_p10=5.0),
+        "bad_slef": _inputs(slef_p90=150.0),
+        "bad_tef_too": _inputs(tef_p10=4.0),
+    }
+
+    with pytest.raises(ValueError) as excinfo:
+        validate_scenarios(scenarios)
+
+    message = str(excinfo.value)
+    assert "bad_tef, bad_tef_too" in message
+    assert "SLEF" in message and "bad_slef" in message
+    assert "ok" not in message
+
+
+def test_validate_scenarios_ignores_slef_without_secondary_losses():
+    validate_scenarios({"primary_only": _inputs(fines_p50=0.0, fines_p90=0.0, slef_p90=150.0)})
+
+
+def test_aggregate_rejects_invalid_scenario_before_simulating():
+    aggregator = FAIRAggregator(n_simulations=10_000, random_state=1)
+
+    with pytest.raises(ValueError, match="bad"):
+        aggregator.aggregate_independent({"ok": _inputs(), "bad": _inputs(susc_p90=120.0)})
+
+
+def test_aggregate_from_samples_matches_aggregate_with_correlation():
+    """Fed the one-factor normals aggregate_with_correlation draws, it gives the same portfolio"""
+    n, rho = 10_000, 0.4
+    scenarios = {"a": _inputs(), "b": _inputs(tef_p50=2.0), "c": _inputs(susc_p50=50.0)}
+
+    expected = FAIRAggregator(n_simulations=n, random_state=3).aggregate_with_correlation(
+        scenarios, correlation=rho
+    )
+
+    # Replay the aggregator's draws: shared factor W, then per-scenario V
+    rng = np.random.default_rng(3)
+    W = rng.standard_normal(n, dtype=np.float32).astype(np.float64)
+    V = rng.standard_normal((n, len(scenarios)), dtype=np.float32).astype(np.float64)
+    Z = (np.sqrt(rho) * W[:, None] + np.sqrt(1 - rho) * V).T
+    Z_before = Z.copy()
+
+    actual = FAIRAggregator(n_simulations=n, random_state=3).aggregate_from_samples(
+        scenarios, Z, correlation=rho
+    )
+
+    np.testing.assert_array_equal(Z, Z_before)  # caller's normals are not modified
+    np.testing.assert_allclose(actual.total_ale_samples, expected.total_ale_samples, rtol=1e-4)
+    assert actual.total_ale_p50 == pytest.approx(expected.total_ale_p50, rel=1e-5)
+    assert actual.assumed_correlation == expected.assumed_correlation == rho
+
+
+def test_aggregate_from_samples_estimates_correlation_when_not_given():
+    n = 10_000
+    Z = np.random.default_rng(0).multivariate_normal([0, 0], [[1, 0.6], [0.6, 1]], size=n).T
+
+    results = FAIRAggregator(n_simulations=n, random_state=1).aggregate_from_samples(
+        {"a": _inputs(), "b": _inputs()}, Z, keep_samples=False
+    )
+
+    assert results.assumed_correlation == pytest.approx(0.6, abs=0.02)
+
+
+@pytest.mark.parametrize("normals, match", [
+    (np.zeros((3, 10_000)), "shape"),
+    (np.zeros((10_000, 2)), "shape"),
+    (np.zeros((2, 5_000)), "shape"),
+    (np.zeros((2, 10_000), dtype=np.int64), "float"),
+    (np.zeros((2, 10_000), dtype=bool), "float"),
+])
+def test_aggregate_from_samples_rejects_bad_normals(normals, match):
+    aggregator = FAIRAggregator(n_simulations=10_000, random_state=1)
+
+    with pytest.raises(ValueError, match=match):
+        aggregator.aggregate_from_samples({"a": _inputs(), "b": _inputs()}, normals)
@@ -0,0 +1,104 @@
+# tests/test_fair_calculator.py
+
+import math
+
+import pytest
+
+from risk_service.fair_calculator import FAIRInputs, FAIRCalculator  # adjust package path if needed
+
+
+def _inputs(**overrides):
+    """A small scenario with primary and secondary losses; fines_p10 is exactly 0"""
+    fields = dict(
+        tef_p10=2.0,
+        tef_p50=5.0,
+        tef_p90=12.0,
+        tef_model="poisson",
+
+        susc_p10=10.0,
+        susc_p50=30.0,
+        susc_p90=60.0,
+
+        productivity_p10=50_000,
+        productivity_p50=180_000,
+        productivity_p90=500_000,
+
+        fines_p10=0.0,
+        fines_p50=50_000,
+        fines_p90=500_000,
+
+        slef_p10=20.0,
+        slef_p50=35.0,
+        slef_p90=60.0,
+    )
+    fields.update(overrides)
+    return FAIRInputs(**fields)
+
+
+def test_sensitivity_zero_change_factor_reproduces_baseline():
+    """
+    Scaling a factor that is 0 leaves the inputs unchanged. With common random
+    numbers the perturbed runs replay the baseline draws, so their ALE must
+    match the baseline exactly, not just within Monte Carlo noise.
+    """
+    calc = FAIRCalculator(n_simulations=20_000, random_state=7)
+    result = calc.sensitivity_analysis(_inputs(), "fines_p10", variation_pct=20)
+
+    assert result["ale_down"] == result["baseline_ale"]
+    assert result["ale_up"] == result["baseline_ale"]
+    assert result["average_elasticity"] == 0.0
+
+
+def test_sensitivity_matches_a_full_rerun():
+    """The perturbed ALE is what a full calculation of the perturbed inputs gives"""
+    inputs = _inputs()
+    result = FAIRCalculator(n_simulations=20_000, random_state=7).sensitivity_analysis(inputs, "tef_p50", 20)
+
+    baseline = FAIRCalculator(n_simulations=20_000, random_state=7).calculate(inputs)
+    perturbed = FAIRCalculator(n_simulations=20_000, random_state=7).calculate(
+        _inputs(tef_p50=inputs.tef_p50 * 1.2)
+    )
+
+    assert result["baseline_ale"] == pytest.approx(baseline.ale_p50, rel=1e-6)
+    assert result["ale_up"] == pytest.approx(perturbed.ale_p50, rel=1e-6)
+
+
+def test_sensitivity_returns_plain_floats():
+    result = FAIRCalculator(n_simulations=5_000, random_state=7).sensitivity_analysis(_inputs(), "susc_p50")
+
+    for key, value in result.items():
+        if key != "factor":
+            assert type(value) is float, key
+
+
+def test_sensitivity_with_zero_baseline_ale_gives_nan_elasticities():
+    """A zero median ALE leaves elasticity undefined, not a ZeroDivisionError"""
+    calc = FAIRCalculator(n_simulations=10_000, random_state=1)
+    result = calc.sensitivity_analysis_batch(_inputs(tef_p10=0, tef_p50=0, tef_p90=1), ["tef_p90"], 10)[0]
+
+    assert result["baseline_ale"] == 0.0
+    for key in ("elasticity_down", "elasticity_up", "average_elasticity"):
+        assert type(result[key]) is float and math.isnan(result[key]), key
+
+
+def test_sensitivity_rejects_zero_variation():
+    with pytest.raises(ValueError):
+        FAIRCalculator(n_simulations=5_000, random_state=7).sensitivity_analysis(_inputs(), "tef_p50", 0)
+
+
+def test_seeded_calculator_replays_draws_on_every_call():
+    calc = FAIRCalculator(n_simulations=5_000, random_state=7)
+
+    assert calc.calculate(_inputs()).ale_mean == calc.calculate(_inputs()).ale_mean
+
+
+def test_unseeded_calculator_draws_afresh_on_every_call():
+    calc = FAIRCalculator(n_simulations=5_000)
+
+    assert calc.calculate(_inputs()).ale_mean != calc.calculate(_inputs()).ale_mean
+
+
+def test_unseeded_sensitivity_still_shares_random_numbers_within_a_call():
+    result = FAIRCalculator(n_simulations=5_000).sensitivity_analysis(_inputs(), "fines_p10")
+
+    assert result["ale_down"] == result["ale_up"] == result["baseline_ale"]
@@ -0,0 +1,80 @@
+# tests/test_fair_distributions.py
+
+import numpy as np
+import pytest
+
+from risk_service.fair_distributions import (  # adjust package path if needed
+    DistributionSampler, validate_percentiles, validate_percentiles_batch,
+)
+
+
+@pytest.mark.parametrize("bounds", [
+    {},
+    {"min_val": 0},
+    {"min_val": 0, "max_val": 100, "is_probability": True},
+])
+def test_validate_percentiles_batch_matches_scalar(bounds):
+    """Every row gets the same verdict and the same messages as the scalar check"""
+    rng = np.random.default_rng(42)
+    rows = rng.uniform(-20, 120, size=(500, 3)).round()
+    rows[:100].sort(axis=1)  # make sure plenty of rows are monotone
+
+    is_valid, errors = validate_percentiles_batch(rows, **bounds)
+
+    for i, (p10, p50, p90) in enumerate(rows):
+        expected_valid, expected_errors = validate_percentiles(p10, p50, p90, **bounds)
+        assert is_valid[i] == expected_valid
+        assert [m for m, idx in errors.items() if i in idx] == expected_errors
+
+
+@pytest.mark.parametrize("size", [4096, 1000, 12345])
+@pytest.mark.filterwarnings("error::UserWarning")  # Sobol balance warning must stay silenced
+def test_qmc_lognormal_moments(size):
+    """Sobol + inverse CDF reproduces the lognormal mean and median, at any size"""
+    loc, mu, sigma = 100.0, 10.0, 0.8
+    samples = DistributionSampler.sample_lognormal(loc, mu, sigma, size=size, random_state=1, method='qmc')
+
+    assert samples.shape == (size,)
+    assert np.isfinite(samples).all() and (samples > loc).all()
+    assert samples.mean() == pytest.approx(loc + np.exp(mu + sigma**2 / 2), rel=0.02)
+    assert np.median(samples) == pytest.approx(loc + np.exp(mu), rel=0.01)
+
+
+@pytest.mark.parametrize("size", [4096, 1000])
+@pytest.mark.filterwarnings("error::UserWarning")
+def test_qmc_beta_moments(size):
+    alpha, beta = 2.0, 5.0
+    samples = DistributionSampler.sample_beta(alpha, beta, 0, 100, size=size, random_state=1, method='qmc')
+
+    assert samples.shape == (size,)
+    assert (samples >= 0).all() and (samples <= 100).all()
+    assert samples.mean() == pytest.approx(100 * alpha / (alpha + beta), rel=0.01)
+    variance = alpha * beta / ((alpha + beta) ** 2 * (alpha + beta + 1))
+    assert samples.var() == pytest.approx(100**2 * variance, rel=0.05)
+
+
+@pytest.mark.parametrize("size", [4096, 1000])
+@pytest.mark.filterwarnings("error::UserWarning")
+def test_qmc_poisson_moments(size):
+    lam = 4.5
+    samples = DistributionSampler.sample_poisson(lam, size=size, random_state=1, method='qmc')
+
+    assert samples.shape == (size,) and samples.dtype == np.int64
+    assert samples.mean() == pytest.approx(lam, rel=0.01)
+    assert samples.var() == pytest.approx(lam, rel=0.05)
+
+
+def test_qmc_is_reproducible_per_seed():
+    a = DistributionSampler.sample_poisson(3.0, size=1000, random_state=7, method='qmc')
+    b = DistributionSampler.sample_poisson(3.0, size=1000, random_state=7, method='qmc')
+    np.testing.assert_array_equal(a, b)
+
+
+@pytest.mark.parametrize("sample", [
+    lambda method: DistributionSampler.sample_lognormal(0, 1, 1, size=10, method=method),
+    lambda method: DistributionSampler.sample_beta(2, 5, 0, 1, size=10, method=method),
+    lambda method: DistributionSampler.sample_poisson(2, size=10, method=method),
+])
+def test_unknown_sampling_method_is_rejected(sample):
+    with pytest.raises(ValueError, match="Unknown sampling method"):
+        sample('sobol')
@@ -0,0 +1,160 @@
+# tests/test_fair_risk_engine.py
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from risk_service import fair_risk_engine as engine  # adjust package path if needed
+
+
+SCENARIO = {
+    "scenario_id": "ransomware",
+    "tef": {"percentiles": {"p10": 2, "p50": 5, "p90": 12}},
+    "susceptibility": {"percentiles": {"p10": 10, "p50": 30, "p90": 60}},
+    "loss_forms": {
+        "productivity": {"p10": 50_000, "p50": 180_000, "p90": 500_000},
+        "fines": {"p10": 0, "p50": 50_000, "p90": 500_000},
+    },
+    "slef": {"percentiles": {"p10": 20, "p50": 35, "p90": 60}},
+    "n_simulations": 10_000,
+}
+
+
+@pytest.fixture
+def client():
+    engine.clear_cache()
+    with TestClient(engine.app) as client:
+        yield client
+
+
+def test_repeat_calculation_is_a_cache_hit(client):
+    first = client.post("/calculate", json=SCENARIO)
+    hits = engine._cached_calculate.cache_info().hits
+    second = client.post("/calculate", json=SCENARIO)
+
+    assert first.status_code == second.status_code == 200
+    assert engine._cached_calculate.cache_info().hits == hits + 1
+    assert second.json() == first.json()
+
+
+def test_repeat_sensitivity_is_a_cache_hit(client):
+    body = {"scenario": SCENARIO, "factor": "tef_p50"}
+    first = client.post("/sensitivity", json=body)
+    hits = engine._cached_sensitivity.cache_info().hits
+    second = client.post("/sensitivity", json=body)
+
+    assert engine._cached_sensitivity.cache_info().hits == hits + 1
+    assert second.json() == first.json()
+
+
+def test_cache_clear_resets_engine_and_distribution_caches(client):
+    client.post("/calculate", json=SCENARIO)
+    client.post("/sensitivity", json={"scenario": SCENARIO, "factor": "tef_p50"})
+    caches = (
+        engine._cached_calculate,
+        engine._cached_sensitivity,
+        engine._get_calculator,
+        engine.DistributionFitter.fit_lognormal,
+        engine.DistributionFitter.fit_poisson_from_percentiles,
+    )
+    assert all(cached.cache_info().currsize for cached in caches)
+
+    response = client.post("/cache/clear")
+
+    assert response.status_code == 200
+    assert response.json()["cleared"] > 0
+    assert [cached.cache_info().currsize for cached in caches] == [0] * len(caches)
+
+
+def test_validate_sets_a_body_etag_and_never_returns_304(client):
+    first = client.post("/validate", json=SCENARIO)
+    etag = first.headers["ETag"]
+    again = client.post("/validate", json=SCENARIO, headers={"If-None-Match": etag})
+    other = client.post("/validate", json=dict(SCENARIO, n_simulations=20_000))
+
+    assert first.status_code == again.status_code == 200
+    assert again.json() == first.json() == {"valid": True, "errors": {}}
+    assert again.headers["ETag"] == etag
+    assert other.headers["ETag"] != etag
+
+
+def test_correlated_aggregate_is_reproducible(client):
+    body = {"scenarios": {"a": SCENARIO, "b": SCENARIO}, "correlation": 0.3, "n_simulations": 10_000}
+    first = client.post("/aggregate", json=body)
+    second = client.post("/aggregate", json=body)
+
+    assert first.status_code == 200
+    assert second.json() == first.json()
+
+
+def _stream_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_portfolio_stream_matches_portfolio_metrics(client):
+    other = dict(SCENARIO, tef={"percentiles": {"p10": 1, "p50": 2, "p90": 4}, "model": "lognormal"})
+    body = {"scenarios": {"a": SCENARIO, "b": other, "c": SCENARIO}, "n_simulations": 10_000}
+
+    response = client.post("/portfolio/metrics/stream", json=body)
+    metrics = client.post("/portfolio/metrics", json=body).json()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    *rows, last = _stream_lines(response)
+    assert [row["scenario_id"] for row in rows] == ["a", "b", "c"]
+    for row in rows:
+        assert row["ale"] == pytest.approx(metrics["scenario_ales"][row["scenario_id"]])
+    portfolio = last["portfolio"]
+    for key in ("total_ale", "expected_events_per_year", "weighted_average_lm", "top_scenario_share"):
+        assert portfolio[key] == pytest.approx(metrics[key])
+    assert portfolio["top_scenario_id"] == metrics["top_scenario_id"]
+
+
+def test_portfolio_stream_rejects_bad_inputs_before_streaming(client):
+    # Passes the request model, but Beta-PERT cannot fit p10 == p50
+    flat = dict(SCENARIO, susceptibility={"percentiles": {"p10": 30, "p50": 30, "p90": 60}})
+    body = {"scenarios": {"ok": SCENARIO, "flat": flat}, "n_simulations": 10_000}
+
+    response = client.post("/portfolio/metrics/stream", json=body)
+
+    assert response.status_code == 400
+    assert "flat" in response.json()["detail"]
+
+
+def test_portfolio_stream_ends_with_error_line_on_failure(client, monkeypatch):
+    calls = []
+
+    def failing_means(args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        return 1.0, 2.0, 3.0
+
+    monkeypatch.setattr(engine, "scenario_means", failing_means)
+    body = {"scenarios": {"a": SCENARIO, "b": SCENARIO, "c": SCENARIO}, "n_simulations": 10_000}
+
+    lines = _stream_lines(client.post("/portfolio/metrics/stream", json=body))
+
+    assert lines[0] == {"scenario_id": "a", "ale": 1.0, "lef": 2.0, "lm": 3.0}
+    assert "worker died" in lines[1]["error"]
+    assert len(lines) == 2
+
+
+def test_aggregate_honours_scenario_dtype(client):
+    def body(dtype_a, dtype_b):
+        return {
+            "scenarios": {"a": dict(SCENARIO, dtype=dtype_a), "b": dict(SCENARIO, dtype=dtype_b)},
+            "n_simulations": 10_000,
+        }
+
+    single = client.post("/aggregate", json=body("float32", "float32")).json()
+    double = client.post("/aggregate", json=body("float64", "float64")).json()
+    mixed = client.post("/aggregate", json=body("float32", "float64"))
+
+    # float64 normals come from a different generator routine, so the two
+    # runs agree only to Monte Carlo precision
+    assert double["total_ale"]["mean"] == pytest.approx(single["total_ale"]["mean"], rel=0.05)
+    assert double["total_ale"] != single["total_ale"]
+    assert mixed.status_code == 400
+    assert "dtype" in mixed.json()["detail"]